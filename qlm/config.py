@@ -27,5 +27,22 @@ class Config:
         self.token_throughput = config_vals["token_throughput"]
         self.slo_granularity = config_vals["slo_granularity"]
         self.model_swap_time = config_vals["model_swap_time"]
+        self.scheduler_interval = config_vals["scheduler_interval"]
+        self.num_shards = config_vals["num_shards"]
+        self.shard_summary_interval = config_vals["shard_summary_interval"]
+        self.shard_rebalance_threshold = config_vals["shard_rebalance_threshold"]
+        self.shard_batch_size = config_vals["shard_batch_size"]
+        self.health_check_interval = config_vals["health_check_interval"]
+        self.health_check_timeout = config_vals["health_check_timeout"]
+        self.circuit_failure_threshold = config_vals["circuit_failure_threshold"]
+        self.circuit_reset_timeout = config_vals["circuit_reset_timeout"]
+        self.prefix_block_size = config_vals["prefix_block_size"]
+        self.prefix_max_blocks = config_vals["prefix_max_blocks"]
+        self.prefix_index_capacity = config_vals["prefix_index_capacity"]
+        self.prefix_lookahead = config_vals["prefix_lookahead"]
+        self.prefix_slo_slack = config_vals["prefix_slo_slack"]
+        self.prefix_ttl = config_vals["prefix_ttl"]
+        self.prefix_load_imbalance = config_vals["prefix_load_imbalance"]
+        self.prefix_max_skips = config_vals["prefix_max_skips"]
 
         self.gurobi = config_vals["gurobi"]
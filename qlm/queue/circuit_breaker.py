@@ -0,0 +1,80 @@
+import time
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker class tracks the health of a single worker.
+    The circuit opens after a number of consecutive failures and no requests are dispatched to the worker while it is
+    open. After the reset timeout, the circuit is half open and the next health check decides whether it closes again.
+    The generation is incremented on every state change, so that results of calls started in an earlier state can be
+    discarded.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        """
+        Initializes a closed circuit breaker.
+        :param failure_threshold: The number of consecutive failures after which the circuit opens.
+        :param reset_timeout: The time in seconds after which an open circuit is probed again.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.generation = 0
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.generation += 1
+
+    def is_closed(self):
+        return self.state == CLOSED
+
+    def should_check(self):
+        """
+        Checks if the worker should be health checked. An open circuit is only checked once the reset timeout elapsed,
+        which moves it to half open.
+        :return: True if the worker should be checked, False otherwise.
+        """
+        if self.state == OPEN:
+            if time.time() - self.opened_at < self.reset_timeout:
+                return False
+            self._set_state(HALF_OPEN)
+
+        return True
+
+    def record_success(self):
+        """
+        Records a successful call to the worker and closes the circuit.
+        :return: True if the circuit was closed by this call, False otherwise.
+        """
+        was_closed = self.state == CLOSED
+        self._set_state(CLOSED)
+        self.failures = 0
+        self.opened_at = None
+
+        return not was_closed
+
+    def record_failure(self):
+        """
+        Records a failed call to the worker. Opens the circuit if the failure threshold is reached or if the circuit
+        is half open.
+        :return: True if the circuit was opened from closed by this call, False otherwise.
+        """
+        self.failures += 1
+
+        if self.state == HALF_OPEN:
+            self._set_state(OPEN)
+            self.opened_at = time.time()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._set_state(OPEN)
+            self.opened_at = time.time()
+            return True
+
+        return False
@@ -17,8 +17,51 @@ class Group:
     def add_request(self, request):
         self.requests.append(request)
 
-    def pop_request(self):
-        return self.requests.popleft()
+    def pop_request(self, idx=0):
+        if idx == 0:
+            return self.requests.popleft()
+
+        request = self.requests[idx]
+        del self.requests[idx]
+        return request
+
+    def snapshot(self):
+        """
+        Returns a GroupSnapshot of the group for the scheduler.
+        """
+        return GroupSnapshot(
+            self.group_id, self.model, self.slo, len(self.requests), self.requests[0].deadline
+        )
+
+    def __len__(self):
+        return len(self.requests)
+
+    def __hash__(self):
+        return hash(self.group_id)
+
+
+class GroupSnapshot:
+    """
+    GroupSnapshot class stores the group level values of a request group that the scheduler needs, so that the
+    scheduler never touches the live group or its requests.
+    """
+
+    def __init__(self, group_id, model, slo, num_requests, deadline):
+        """
+        :param group_id: The id of the group
+        :param model: The model of the group
+        :param slo: The SLO of the group, updated by the scheduler to the remaining SLO
+        :param num_requests: The number of queued requests in the group
+        :param deadline: The deadline of the head request of the group
+        """
+        self.group_id = group_id
+        self.model = model
+        self.slo = slo
+        self.num_requests = num_requests
+        self.deadline = deadline
+
+    def __len__(self):
+        return self.num_requests
 
     def __hash__(self):
         return hash(self.group_id)
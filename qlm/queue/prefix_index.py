@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+
+
+class PrefixIndex:
+    """
+    PrefixIndex class tracks which workers recently served which prompt prefixes.
+    Prompts are split into fixed size character blocks and every prefix is identified by a rolling hash over its blocks,
+    so that the prefixes of all prompts form a trie keyed by hash. Every prefix stores the last time each worker served
+    it, and workers that did not serve a prefix within the ttl no longer match it. Prefixes are evicted in least recently
+    served order, where a prefix is always more recent than its longer prefixes.
+    """
+
+    def __init__(self, block_size, max_blocks, capacity, ttl):
+        """
+        Initializes an empty prefix index.
+        :param block_size: The number of characters per block.
+        :param max_blocks: The maximum number of leading blocks of a prompt that are indexed.
+        :param capacity: The maximum number of prefixes in the index.
+        :param ttl: The time in seconds for which a worker matches a prefix after serving it.
+        """
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.capacity = capacity
+        self.ttl = ttl
+        self.prefixes = OrderedDict()
+
+    def get_prefix_hashes(self, prompt):
+        """
+        Computes the rolling hashes of the leading complete blocks of a prompt.
+        :param prompt: The prompt of the request.
+        :return: List of hashes, where the i-th hash identifies the prefix made of the first i + 1 blocks.
+        """
+        prefix_hashes = []
+        prefix_hash = 0
+        end = min(len(prompt), self.block_size * self.max_blocks)
+
+        for start in range(0, end - self.block_size + 1, self.block_size):
+            prefix_hash = hash((prefix_hash, prompt[start : start + self.block_size]))
+            prefix_hashes.append(prefix_hash)
+
+        return prefix_hashes
+
+    def record(self, prefix_hashes, worker):
+        """
+        Records that a worker served a prompt with the given prefix hashes.
+        :param prefix_hashes: The prefix hashes of the prompt.
+        :param worker: Worker object
+        """
+        curr_time = time.time()
+
+        # Longer prefixes are touched first, so that they are evicted before their shorter prefixes
+        for prefix_hash in reversed(prefix_hashes):
+            served = self.prefixes.get(prefix_hash)
+            if served is None:
+                served = {}
+                self.prefixes[prefix_hash] = served
+            else:
+                self.prefixes.move_to_end(prefix_hash)
+                for stale_worker in [w for w, t in served.items() if curr_time - t > self.ttl]:
+                    del served[stale_worker]
+            served[worker] = curr_time
+
+        while len(self.prefixes) > self.capacity:
+            self.prefixes.popitem(last=False)
+
+    def match(self, prefix_hashes):
+        """
+        Finds the workers that served a prefix of the prompt within the ttl.
+        :param prefix_hashes: The prefix hashes of the prompt.
+        :return: Dictionary of worker to the number of matched blocks.
+        """
+        curr_time = time.time()
+        matches = {}
+
+        for num_blocks, prefix_hash in enumerate(prefix_hashes, start=1):
+            served = self.prefixes.get(prefix_hash)
+            if served is None:
+                break
+            recent_workers = [w for w, t in served.items() if curr_time - t <= self.ttl]
+            if len(recent_workers) == 0:
+                break
+            for worker in recent_workers:
+                matches[worker] = num_blocks
+
+        return matches
+
+    def match_worker(self, prefix_hashes, worker):
+        """
+        Finds the number of leading blocks of the prompt that the worker served within the ttl.
+        :param prefix_hashes: The prefix hashes of the prompt.
+        :param worker: Worker object
+        :return: The number of matched blocks.
+        """
+        curr_time = time.time()
+        num_blocks = 0
+
+        for prefix_hash in prefix_hashes:
+            served = self.prefixes.get(prefix_hash)
+            if served is None or curr_time - served.get(worker, float("-inf")) > self.ttl:
+                break
+            num_blocks += 1
+
+        return num_blocks
@@ -2,7 +2,8 @@ import asyncio
 from collections import deque
 from qlm.config import Config
 from qlm.queue.virtual_queue_engine import VirtualQueueEngine
-from qlm.queue.worker import Worker
+from qlm.queue.worker import INF
+from qlm.queue.worker_registry import WorkerRegistry
 from qlm.queue.request import Request
 from qlm.endpoints.endpoint import Endpoint
 
@@ -15,21 +16,28 @@ class Queue:
 
     def __init__(self):
         """
-        Initializes the queue with an empty list of workers, a Config object and a VirtualQueueEngine object.
+        Initializes the queue with a Config object, a VirtualQueueEngine object and an empty WorkerRegistry object.
         """
-        self.workers = []
         self.config = Config()
         self.vq_engine = VirtualQueueEngine()
+        self.registry = WorkerRegistry(self.vq_engine)
 
     def register_worker(self, address, port, endpoint):
         """
-        Registers a worker with the queue.
+        Registers a worker with the queue. Workers can be registered while the queue is running.
         :param address: The address of the worker.
         :param port: The port of the worker.
+        :param endpoint: The endpoint of the worker, None for remote workers that are not managed by QLM.
+        :return: Worker object
         """
-        worker = Worker(address, port, endpoint)
-        self.workers.append(worker)
-        self.vq_engine.add_worker(worker)
+        return self.registry.register(address, port, endpoint)
+
+    def deregister_worker(self, worker):
+        """
+        Deregisters a worker from the queue. Its request groups are redistributed to the remaining workers.
+        :param worker: Worker object returned by register_worker.
+        """
+        self.registry.deregister(worker)
 
     def push(self, prompt, model, slo, insertion_time):
         """
@@ -49,24 +57,69 @@ class Queue:
     async def run_queue(self):
         """
         Runs the queue. The queue runs in an infinite loop and continuously interacts with the virtual queue engine.
+        The scheduler runs in a separate thread on a snapshot of the virtual queues while dispatch continues with the
+        current order. Once the scheduler finishes, its plan is applied. A new snapshot is scheduled when groups were
+        added or drained or the scheduler interval elapsed.
+        Workers are health checked in the background and only workers with a closed circuit breaker are served.
         If a request is found, the queue checks for backpressure and if the worker can handle the request.
         If the worker can handle the request, the request is popped from the virtual queue engine and added to the worker.
         """
 
-        while True:
-            self.vq_engine.reorder_vqs()
-            for worker in self.workers:
-                try:
-                    backpressure = worker.get_backpressure()
-                    has_request = self.vq_engine.has_request(worker)
-
-                    if has_request and backpressure < self.config.max_batch_size:
-                        request_to_serve = self.vq_engine.pop_request(worker)
-                        await asyncio.to_thread(
-                            worker.add_request,
-                            request_to_serve.prompt,
-                            request_to_serve.model,
+        schedule_task = None
+        health_check_task = asyncio.create_task(self.registry.run_health_checks())
+
+        try:
+            while True:
+                if schedule_task is not None and schedule_task.done():
+                    try:
+                        self.vq_engine.apply_plan(schedule_task.result())
+                    except Exception as e:
+                        # Keep dispatching with the current order if the scheduler fails
+                        print("Error in computing schedule plan:", e)
+                    schedule_task = None
+
+                if schedule_task is None and self.vq_engine.should_schedule():
+                    schedule_task = asyncio.create_task(
+                        asyncio.to_thread(
+                            self.vq_engine.compute_plan, *self.vq_engine.snapshot()
                         )
+                    )
+
+                # Read the backpressure of all workers concurrently outside the event loop
+                workers = self.registry.get_available_workers()
+                generations = [self.registry.get_generation(worker) for worker in workers]
+                backpressures = await asyncio.gather(
+                    *(asyncio.to_thread(worker.get_backpressure) for worker in workers)
+                )
+
+                for worker, generation, backpressure in zip(workers, generations, backpressures):
+                    if backpressure == INF:
+                        self.registry.record_failure(worker, generation)
+                        continue
+                    self.registry.record_success(worker, generation)
+
+                    # The worker may have left or failed while a previous request was being dispatched
+                    if not self.registry.is_available(worker):
+                        continue
+
+                    try:
+                        has_request = self.vq_engine.has_request(worker)
+
+                        if has_request and backpressure < self.config.max_batch_size:
+                            request_to_serve = self.vq_engine.pop_request(worker)
+                            await asyncio.to_thread(
+                                worker.add_request,
+                                request_to_serve.prompt,
+                                request_to_serve.model,
+                            )
+
+                    except asyncio.CancelledError as e:
+                        print("handling cancelled error", e)
+                        raise
 
-                except asyncio.CancelledError as e:
-                    print("handling cancelled error", e)
+                # Yield to the event loop so that ingestion and the scheduler thread can make progress
+                await asyncio.sleep(0)
+        finally:
+            health_check_task.cancel()
+            if schedule_task is not None:
+                schedule_task.cancel()
@@ -19,6 +19,12 @@ class Request:
         self.slo = slo
         self.model = model
         self.insertion_time = insertion_time
+        # Absolute deadline of the request, not updated with the SLO
+        self.deadline = insertion_time + slo
+        # Prefix hashes of the prompt, computed by the virtual queue engine
+        self.prefix_hashes = []
+        # Number of times the request was skipped at the head of its group for a shared-prefix request
+        self.skips = 0
 
     def __hash__(self):
         return hash(self.request_id)
@@ -0,0 +1,123 @@
+import asyncio
+import queue
+from qlm.queue.queue import Queue
+
+
+class Shard:
+    """
+    Shard class runs a Queue for a subset of the workers in a separate process.
+    Messages are received from the coordinator through an inbox and a summary of the queue state is published to
+    shared memory for cross-shard group placement. The inbox carries the following messages:
+    ("request", prompt, model, slo, insertion_time) for a new request from the coordinator,
+    ("transferred", prompt, model, slo, insertion_time) for a request moved from another shard,
+    ("transfer", model, slo, shard_id) to move the queued requests of a group to another shard,
+    and None to stop the shard.
+    """
+
+    # Number of summary values per shard: received requests and queued requests
+    SUMMARY_FIELDS = 2
+
+    def __init__(self, shard_id, inboxes, summaries, batch_size):
+        """
+        Initializes the shard with an empty list of workers.
+        :param shard_id: The index of the shard.
+        :param inboxes: The multiprocessing queues of all shards, indexed by shard id.
+        :param summaries: The shared memory array to which the shard publishes its summary.
+        :param batch_size: The maximum number of messages read from the inbox at once.
+        """
+        self.shard_id = shard_id
+        self.inboxes = inboxes
+        self.inbox = inboxes[shard_id]
+        self.summaries = summaries
+        self.batch_size = batch_size
+        self.worker_specs = []
+        self.received = 0
+
+    def add_worker(self, address, port, endpoint):
+        """
+        Adds a worker to the shard. The worker is registered when the shard process starts.
+        :param address: The address of the worker.
+        :param port: The port of the worker.
+        :param endpoint: The endpoint of the worker.
+        """
+        self.worker_specs.append((address, port, endpoint))
+
+    def run(self):
+        """
+        Entry point of the shard process.
+        """
+        asyncio.run(self._run())
+
+    async def _run(self):
+        """
+        Runs the queue of the shard along with ingestion and summary publishing until the inbox is closed.
+        """
+        self.queue = Queue()
+        for address, port, endpoint in self.worker_specs:
+            self.queue.register_worker(address, port, endpoint)
+
+        ingest_task = asyncio.create_task(self._ingest())
+        other_tasks = [
+            asyncio.create_task(self.queue.run_queue()),
+            asyncio.create_task(self._publish_summary()),
+        ]
+
+        await ingest_task
+        for task in other_tasks:
+            task.cancel()
+
+    def _get_requests(self):
+        """
+        Blocks until a message is available in the inbox and reads all available messages up to the batch size.
+        :return: List of messages, where None marks that the inbox is closed.
+        """
+        messages = [self.inbox.get()]
+        while messages[-1] is not None and len(messages) < self.batch_size:
+            try:
+                messages.append(self.inbox.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def _transfer_group(self, model, slo, shard_id):
+        """
+        Moves the queued requests of a group to another shard.
+        :param model: The model of the request group.
+        :param slo: The SLO of the request group.
+        :param shard_id: The index of the shard the requests are moved to.
+        """
+        for request in self.queue.vq_engine.remove_group(model, slo):
+            self.inboxes[shard_id].put(
+                ("transferred", request.prompt, request.model, request.slo, request.insertion_time)
+            )
+
+    async def _ingest(self):
+        """
+        Handles messages from the inbox until the inbox is closed.
+        """
+        while True:
+            messages = await asyncio.to_thread(self._get_requests)
+
+            for message in messages:
+                if message is None:
+                    return
+
+                if message[0] == "transfer":
+                    self._transfer_group(*message[1:])
+                    continue
+
+                self.queue.push(*message[1:])
+                # Transferred requests are not counted, they were not sent to this shard by the coordinator
+                if message[0] == "request":
+                    self.received += 1
+
+    async def _publish_summary(self):
+        """
+        Periodically publishes the number of received requests and queued requests.
+        """
+        offset = self.shard_id * self.SUMMARY_FIELDS
+
+        while True:
+            self.summaries[offset] = self.received
+            self.summaries[offset + 1] = self.queue.vq_engine.get_num_requests()
+            await asyncio.sleep(self.queue.config.shard_summary_interval)
@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+from qlm.config import Config
+from qlm.queue.shard import Shard
+
+
+class ShardedQueue:
+    """
+    ShardedQueue class runs the queue across several processes. Each shard process owns a subset of the workers and
+    their virtual queues. The ShardedQueue acts as a coordinator that places request groups on shards based on the
+    queue state summaries published by the shards and rebalances groups away from overloaded shards.
+    Unlike Queue, the set of workers is fixed once the queue runs.
+    """
+
+    def __init__(self, num_shards=None):
+        """
+        Initializes the coordinator with the shards, a shared memory array for the shard summaries and an empty
+        model-slo to shard mapping.
+        :param num_shards: The number of shard processes. Defaults to num_shards in config.yaml.
+        """
+        self.config = Config()
+        self.num_shards = num_shards or self.config.num_shards
+
+        # Shard processes are forked so that endpoints are inherited without pickling
+        self.context = multiprocessing.get_context("fork")
+        self.summaries = self.context.Array(
+            "d", self.num_shards * Shard.SUMMARY_FIELDS, lock=False
+        )
+        inboxes = [self.context.Queue() for _ in range(self.num_shards)]
+        self.shards = [
+            Shard(shard_id, inboxes, self.summaries, self.config.shard_batch_size)
+            for shard_id in range(self.num_shards)
+        ]
+        self.num_workers = [0] * self.num_shards
+        self.sent = [0] * self.num_shards
+        self.model_slo_shard = {}
+        self.processes = []
+
+    def register_worker(self, address, port, endpoint):
+        """
+        Registers a worker with the shard that has the fewest workers. Workers must be registered before the queue runs
+        and cannot be deregistered. Unlike Queue.register_worker, no Worker object is returned since the worker is
+        created in the shard process.
+        :param address: The address of the worker.
+        :param port: The port of the worker.
+        :param endpoint: The endpoint of the worker.
+        """
+        if self.processes:
+            raise Exception("Workers must be registered before running the queue")
+
+        shard_idx = min(range(self.num_shards), key=lambda idx: self.num_workers[idx])
+        self.shards[shard_idx].add_worker(address, port, endpoint)
+        self.num_workers[shard_idx] += 1
+
+    def _get_load(self, shard_idx):
+        """
+        Estimates the load of a shard as the number of queued and in-flight requests per worker.
+        :param shard_idx: The index of the shard.
+        :return: The load of the shard.
+        """
+        offset = shard_idx * Shard.SUMMARY_FIELDS
+        received = self.summaries[offset]
+        queued = self.summaries[offset + 1]
+        in_flight = self.sent[shard_idx] - received
+
+        return (queued + in_flight) / self.num_workers[shard_idx]
+
+    def _place_group(self, model, slo):
+        """
+        Selects the shard for a request group. New groups are placed on the least loaded shard. Existing groups are moved
+        to the least loaded shard if their shard is overloaded by more than the rebalance threshold. The queued requests
+        of a moved group are handed over by its previous shard.
+        :param model: The model of the request group.
+        :param slo: The SLO of the request group.
+        :return: The index of the shard.
+        """
+        candidates = [idx for idx in range(self.num_shards) if self.num_workers[idx] > 0]
+        if len(candidates) == 0:
+            raise Exception("Workers must be registered before pushing requests")
+
+        loads = {idx: self._get_load(idx) for idx in candidates}
+        least_loaded = min(candidates, key=lambda idx: loads[idx])
+
+        if (model, slo) not in self.model_slo_shard:
+            self.model_slo_shard[(model, slo)] = least_loaded
+        else:
+            shard_idx = self.model_slo_shard[(model, slo)]
+            if loads[shard_idx] - loads[least_loaded] > self.config.shard_rebalance_threshold:
+                print("Rebalancing group with model and slo", model, slo,
+                      "from shard", shard_idx, "to shard", least_loaded)
+                self.model_slo_shard[(model, slo)] = least_loaded
+                self.shards[shard_idx].inbox.put(("transfer", model, slo, least_loaded))
+
+        return self.model_slo_shard[(model, slo)]
+
+    def push(self, prompt, model, slo, insertion_time):
+        """
+        Pushes a request to the shard that owns its request group.
+        :param prompt: The prompt for the request.
+        :param model: The model for the request.
+        :param slo: The SLO for the request.
+        :param insertion_time: The time at which the request was inserted into the queue.
+        """
+        shard_idx = self._place_group(model, slo)
+        self.shards[shard_idx].inbox.put(("request", prompt, model, slo, insertion_time))
+        self.sent[shard_idx] += 1
+
+    def start(self):
+        """
+        Starts a process for every shard with at least one worker.
+        """
+        for shard_idx, shard in enumerate(self.shards):
+            if self.num_workers[shard_idx] == 0:
+                continue
+            process = self.context.Process(target=shard.run, daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def stop(self):
+        """
+        Closes the inbox of every shard and waits for the shard processes to exit.
+        """
+        for shard in self.shards:
+            shard.inbox.put(None)
+        for process in self.processes:
+            process.join()
+
+    async def run_queue(self):
+        """
+        Runs the queue. Starts the shard processes and waits for them to exit. Stops the shards if cancelled,
+        without blocking the event loop.
+        """
+        self.start()
+
+        try:
+            await asyncio.gather(
+                *(asyncio.to_thread(process.join) for process in self.processes)
+            )
+        except asyncio.CancelledError as e:
+            print("handling cancelled error", e)
+            await asyncio.to_thread(self.stop)
+            raise
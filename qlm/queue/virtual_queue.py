@@ -1,3 +1,4 @@
+import copy
 import uuid
 from collections import deque
 from qlm.queue.request import Request
@@ -22,5 +23,13 @@ class VirtualQueue:
     def get_head_group(self):
         return self.groups[0]
 
+    def snapshot(self):
+        """
+        Returns a copy of the virtual queue with the same vq id and snapshots of all its groups.
+        """
+        vq = copy.copy(self)
+        vq.groups = deque(group.snapshot() for group in self.groups)
+        return vq
+
     def __hash__(self):
         return hash(self.vq_id)
@@ -4,7 +4,12 @@ from qlm.queue.virtual_queue import VirtualQueue
 from qlm.queue.group import Group
 from qlm.queue.request import Request
 from qlm.scheduler.scheduler import Scheduler
+from qlm.scheduler.schedule_plan import SchedulePlan
+from qlm.queue.prefix_index import PrefixIndex
+from qlm.config import Config
 import random
+import time
+from collections import deque
 
 
 class VirtualQueueEngine:
@@ -15,14 +20,29 @@ class VirtualQueueEngine:
     def __init__(self):
         """
         Initializes the VirtualQueueEngine with empty virtual queues, request to group mapping, group to virtual queue
-        mapping, virtual queue to worker mapping, model-slo to group mapping and a scheduler.
+        mapping, virtual queue to worker mapping, model-slo to group mapping, a scheduler, the schedule plan versions and
+        a prefix index. Groups are held as unassigned while there are no virtual queues. The state version counts
+        changes to the set of groups and virtual queues and is used to pace the scheduler.
         """
+        self.config = Config()
         self.vqs = []
         self.request_to_group = {}
         self.group_to_vq = {}
         self.vq_worker_bimap = bidict({})
         self.model_slo_group_bimap = bidict({})
         self.scheduler = Scheduler()
+        self.unassigned_groups = deque()
+        self.snapshot_version = 0
+        self.plan_version = 0
+        self.state_version = 0
+        self.snapshot_state_version = None
+        self.snapshot_time = 0
+        self.prefix_index = PrefixIndex(
+            self.config.prefix_block_size,
+            self.config.prefix_max_blocks,
+            self.config.prefix_index_capacity,
+            self.config.prefix_ttl,
+        )
 
     def add_worker(self, worker):
         """
@@ -32,6 +52,119 @@ class VirtualQueueEngine:
         new_vq = VirtualQueue()
         self.vqs.append(new_vq)
         self.vq_worker_bimap[new_vq] = worker
+        self.state_version += 1
+
+        while len(self.unassigned_groups) > 0:
+            self._assign_group(self.unassigned_groups.popleft())
+
+    def remove_worker(self, worker):
+        """
+        Removes a worker from the virtual queue engine. The groups of the associated virtual queue are redistributed to
+        the remaining virtual queues.
+        :param worker: Worker object
+        """
+        vq = self.vq_worker_bimap.inv[worker]
+        del self.vq_worker_bimap.inv[worker]
+        self.vqs.remove(vq)
+        self.state_version += 1
+
+        for group in vq.groups:
+            self._assign_group(group)
+
+    def _get_slack(self, request):
+        """
+        Computes the remaining time of a request before its SLO is violated.
+        :param request: Request object
+        :return: Remaining time in seconds
+        """
+        return request.deadline - time.time()
+
+    def _get_waiting_time(self, vq):
+        """
+        Estimates the waiting time of all groups in a virtual queue.
+        :param vq: VirtualQueue object
+        :return: Estimated waiting time in seconds
+        """
+        return sum(self.scheduler.rwt_estimator.get_waiting_time(group) for group in vq.groups)
+
+    def _select_vq(self, group):
+        """
+        Selects a virtual queue for a group. Prefers the virtual queue of the worker that recently served the longest
+        prefix of the head request of the group, breaking ties by the lowest estimated waiting time. A virtual queue is
+        only preferred if its waiting time exceeds the least loaded virtual queue by at most the prefix load imbalance
+        and the head request still meets its deadline with the prefix slack. Otherwise, selects a random virtual queue.
+        :param group: Group object
+        :return: VirtualQueue object
+        """
+        matches = self.prefix_index.match(group.requests[0].prefix_hashes)
+        slack = self._get_slack(group.requests[0])
+        group_waiting_time = self.scheduler.rwt_estimator.get_waiting_time(group)
+        waiting_times = {vq: self._get_waiting_time(vq) for vq in self.vqs}
+        min_waiting_time = min(waiting_times.values())
+
+        candidates = [
+            (num_blocks, self.vq_worker_bimap.inv[worker])
+            for worker, num_blocks in matches.items()
+            if worker in self.vq_worker_bimap.inv
+        ]
+        for num_blocks, vq in sorted(candidates, key=lambda x: (-x[0], waiting_times[x[1]])):
+            if waiting_times[vq] - min_waiting_time > self.config.prefix_load_imbalance:
+                continue
+            if waiting_times[vq] + group_waiting_time <= slack - self.config.prefix_slo_slack:
+                return vq
+
+        vq_idx = random.choice(range(len(self.vqs)))
+        return self.vqs[vq_idx]
+
+    def _assign_group(self, group):
+        """
+        Assigns a group to a virtual queue. If there are no virtual queues, the group is held as unassigned.
+        :param group: Group object
+        """
+        self.state_version += 1
+
+        if len(self.vqs) == 0:
+            self.unassigned_groups.append(group)
+            self.group_to_vq.pop(group, None)
+            return
+
+        vq = self._select_vq(group)
+        vq.add_group(group)
+        self.group_to_vq[group] = vq
+
+    def _select_request(self, group, worker):
+        """
+        Selects the next request to dispatch from a group. Among the first requests of the group, prefers the request
+        with the longest prefix recently served by the worker, so that shared-prefix requests are dispatched
+        consecutively. The head request is selected once it was skipped prefix_max_skips times or if its slack does not
+        cover the service time of the skipped requests and its own service time.
+        :param group: Group object
+        :param worker: Worker object
+        :return: Index of the request in the group
+        """
+        head = group.requests[0]
+        service_time = self.scheduler.rwt_estimator.get_service_time(group.model)
+
+        if head.skips >= self.config.prefix_max_skips:
+            return 0
+        # Skipping the head once more delays it by the service time of one more request
+        if self._get_slack(head) - self.config.prefix_slo_slack <= (head.skips + 2) * service_time:
+            return 0
+
+        best_idx = 0
+        best_num_blocks = 0
+        for idx in range(min(self.config.prefix_lookahead, len(group.requests))):
+            num_blocks = self.prefix_index.match_worker(
+                group.requests[idx].prefix_hashes, worker
+            )
+            if num_blocks > best_num_blocks:
+                best_idx = idx
+                best_num_blocks = num_blocks
+
+        if best_idx != 0:
+            head.skips += 1
+
+        return best_idx
 
     def add_request(self, request):
         """
@@ -39,6 +172,8 @@ class VirtualQueueEngine:
         the group. Otherwise, creates a new group and adds the request to the new group.
         :param request: Request object
         """
+        request.prefix_hashes = self.prefix_index.get_prefix_hashes(request.prompt)
+
         if (request.model, request.slo) in self.model_slo_group_bimap:
             existing_group = self.model_slo_group_bimap[(request.model, request.slo)]
             existing_group.add_request(request)
@@ -51,23 +186,26 @@ class VirtualQueueEngine:
             self.model_slo_group_bimap[(request.model, request.slo)] = new_group
             self.request_to_group[request] = new_group
 
-            # Select a random virtual queue to add the group to
-            vq_idx = random.choice(range(len(self.vqs)))
-            self.vqs[vq_idx].add_group(new_group)
+            self._assign_group(new_group)
 
     def pop_request(self, worker):
         """
-        Pops a request from the virtual queue associated with the worker. If the group is empty, pops the group from the
-        virtual queue.
+        Pops a request from the head group of the virtual queue associated with the worker and records its prefix as
+        served by the worker. If the group is empty, pops the group from the virtual queue.
         :param worker: Worker object
         :return: Request object
         """
         vq = self.vq_worker_bimap.inv[worker]
         group = vq.get_head_group()
-        request = group.pop_request()
+        request = group.pop_request(self._select_request(group, worker))
+        self.prefix_index.record(request.prefix_hashes, worker)
 
         if len(group.requests) == 0:
             vq.pop_group()
+            # Drained groups are retired so that new requests form a fresh group in a virtual queue
+            del self.model_slo_group_bimap.inv[group]
+            del self.group_to_vq[group]
+            self.state_version += 1
 
         return request
 
@@ -80,10 +218,114 @@ class VirtualQueueEngine:
         vq = self.vq_worker_bimap.inv[worker]
         return len(vq.groups) > 0
 
+    def remove_group(self, model, slo):
+        """
+        Removes the group with the given model and slo from the virtual queue engine.
+        :param model: The model of the group.
+        :param slo: The SLO of the group.
+        :return: List of the queued requests of the group, empty if there is no such group
+        """
+        if (model, slo) not in self.model_slo_group_bimap:
+            return []
+
+        group = self.model_slo_group_bimap.pop((model, slo))
+        vq = self.group_to_vq.pop(group, None)
+        if vq is not None:
+            vq.groups.remove(group)
+        else:
+            self.unassigned_groups.remove(group)
+
+        for request in group.requests:
+            del self.request_to_group[request]
+        self.state_version += 1
+
+        return list(group.requests)
+
+    def get_num_requests(self):
+        """
+        Counts the queued requests of all groups, including unassigned groups.
+        :return: Number of queued requests
+        """
+        return sum(len(group.requests) for group in self.model_slo_group_bimap.values())
+
+    def should_schedule(self):
+        """
+        Checks if the scheduler should run on a new snapshot, i.e. if groups or virtual queues were added or removed since
+        the last snapshot or the scheduler interval elapsed.
+        :return: Boolean
+        """
+        if self.state_version != self.snapshot_state_version:
+            return True
+        return time.time() - self.snapshot_time >= self.config.scheduler_interval
+
+    def snapshot(self):
+        """
+        Takes a snapshot of the virtual queues and their groups for the scheduler. Only group level values are copied.
+        Must be called from the event loop.
+        :return: Tuple of snapshot version and list of snapshot virtual queues
+        """
+        self.snapshot_version += 1
+        self.snapshot_state_version = self.state_version
+        self.snapshot_time = time.time()
+        return self.snapshot_version, [vq.snapshot() for vq in self.vqs]
+
+    def compute_plan(self, version, vqs):
+        """
+        Runs the scheduler on a snapshot of the virtual queues. The scheduler only updates the group snapshots, so it
+        can run outside the event loop.
+        :param version: Version of the snapshot
+        :param vqs: List of snapshot virtual queues
+        :return: SchedulePlan object if the scheduler detects an SLO violation, None otherwise
+        """
+        if not self.scheduler.check_violation(vqs):
+            return None
+
+        reordered_vqs = self.scheduler.reorder(vqs)
+        if reordered_vqs is None:
+            return None
+
+        return SchedulePlan(version, reordered_vqs)
+
+    def apply_plan(self, plan):
+        """
+        Applies a schedule plan to the live virtual queues. Groups drained since the snapshot are dropped from the plan
+        and groups added since the snapshot keep their current virtual queue, behind the planned groups. Plans older
+        than the last applied plan are discarded. Must be called from the event loop.
+        :param plan: SchedulePlan object
+        :return: Boolean indicating whether the plan was applied
+        """
+        if plan is None or plan.version <= self.plan_version:
+            return False
+
+        live_groups = {group.group_id: group for vq in self.vqs for group in vq.groups}
+        vq_by_id = {vq.vq_id: vq for vq in self.vqs}
+        new_orders = {vq: [] for vq in self.vqs}
+
+        for vq_id, group_ids in plan.vq_orders.items():
+            # Virtual queues removed since the snapshot keep their groups through the unplanned path below
+            if vq_id not in vq_by_id:
+                continue
+            for group_id in group_ids:
+                group = live_groups.pop(group_id, None)
+                if group is not None:
+                    new_orders[vq_by_id[vq_id]].append(group)
+
+        unplanned_groups = set(live_groups.values())
+        for vq in self.vqs:
+            new_orders[vq].extend(group for group in vq.groups if group in unplanned_groups)
+
+        for vq, groups in new_orders.items():
+            vq.groups = deque(groups)
+            for group in groups:
+                self.group_to_vq[group] = vq
+
+        self.plan_version = plan.version
+        return True
+
     def reorder_vqs(self):
         """
         Reorders the virtual queues based on the scheduler. If the scheduler detects an SLO violation, reorders the virtual
-        queues. Else, keeps the queues as is.
+        queues. Else, keeps the queues as is. Runs the scheduler synchronously, see Queue.run_queue for the
+        asynchronous path.
         """
-        if self.scheduler.check_violation(self.vqs):
-            self.vqs = self.scheduler.reorder(self.vqs)
+        self.apply_plan(self.compute_plan(*self.snapshot()))
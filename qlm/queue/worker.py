@@ -2,6 +2,7 @@ import requests
 import uuid
 from openai import OpenAI
 from qlm.endpoints.endpoint import Endpoint
+from qlm.config import Config
 
 
 INF = float("inf")
@@ -15,9 +16,11 @@ class Worker:
         Initialize a worker instance. Uses openAI API to communicate with the worker.
         :param address: The address of the worker.
         :param port: The port of the worker.
+        :param endpoint: The endpoint of the worker, None for remote workers that are not managed by QLM.
         """
-        self.address = f"http://localhost:{port}"
-        self.endpoint= endpoint
+        self.address = f"http://{address}:{port}"
+        self.endpoint = endpoint
+        self.config = Config()
         self.openai_api_base = f"{self.address}/v1"
         self.openai_api_key = "EMPTY"
         self.client = OpenAI(
@@ -35,7 +38,7 @@ class Worker:
         :param model: The model to be used.
         """
 
-        if self.endpoint.model != model:
+        if self.endpoint is not None and self.endpoint.model != model:
             self.endpoint.model_swap(model)
 
         try:
@@ -49,12 +52,27 @@ class Worker:
         """
         Reads all metrics from the worker and checks for a match with the metric name.
         """
-        metrics = requests.get(f"{self.address}/metrics")
+        metrics = requests.get(
+            f"{self.address}/metrics", timeout=self.config.health_check_timeout
+        )
 
         for line in metrics.text.splitlines():
             if line.startswith(metric_name):
                 return float(line.split()[-1])
 
+    def check_health(self):
+        """
+        Checks if the worker is reachable and healthy.
+        return: True if the worker is healthy, False otherwise.
+        """
+        try:
+            response = requests.get(
+                f"{self.address}/health", timeout=self.config.health_check_timeout
+            )
+            return response.status_code == 200
+        except Exception as e:
+            return False
+
     def get_backpressure(self):
         """
         Get the backpressure of the worker i.e. the number of requests currently being served.
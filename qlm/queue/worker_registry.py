@@ -0,0 +1,122 @@
+import asyncio
+from qlm.config import Config
+from qlm.queue.circuit_breaker import CircuitBreaker
+from qlm.queue.worker import Worker
+
+
+class WorkerRegistry:
+    """
+    WorkerRegistry class manages the pool of workers. Workers can join and leave at runtime and are periodically health
+    checked. Workers with an open circuit breaker are removed from the virtual queue engine, so that their request
+    groups are redistributed to the remaining workers, and are added back once they recover.
+    """
+
+    def __init__(self, vq_engine):
+        """
+        Initializes the registry with an empty worker to circuit breaker mapping.
+        :param vq_engine: The virtual queue engine the available workers are registered with.
+        """
+        self.config = Config()
+        self.vq_engine = vq_engine
+        self.workers = {}
+
+    def register(self, address, port, endpoint):
+        """
+        Registers a worker and adds it to the virtual queue engine.
+        :param address: The address of the worker.
+        :param port: The port of the worker.
+        :param endpoint: The endpoint of the worker, None for remote workers.
+        :return: Worker object
+        """
+        worker = Worker(address, port, endpoint)
+        self.workers[worker] = CircuitBreaker(
+            self.config.circuit_failure_threshold, self.config.circuit_reset_timeout
+        )
+        self.vq_engine.add_worker(worker)
+
+        return worker
+
+    def deregister(self, worker):
+        """
+        Deregisters a worker. If the worker is available, its request groups are redistributed to the remaining workers.
+        :param worker: Worker object
+        """
+        breaker = self.workers.pop(worker)
+        if breaker.is_closed():
+            self.vq_engine.remove_worker(worker)
+
+        print(f"Worker {worker.worker_id} deregistered")
+
+    def is_available(self, worker):
+        """
+        Checks if the worker is registered and its circuit breaker is closed.
+        :param worker: Worker object
+        :return: Boolean
+        """
+        return worker in self.workers and self.workers[worker].is_closed()
+
+    def get_available_workers(self):
+        """
+        Returns the list of workers with a closed circuit breaker.
+        """
+        return [worker for worker, breaker in self.workers.items() if breaker.is_closed()]
+
+    def get_generation(self, worker):
+        """
+        Returns the generation of the circuit breaker of the worker, to be passed to record_success or record_failure.
+        :param worker: Worker object
+        """
+        return self.workers[worker].generation
+
+    def _is_current(self, worker, generation):
+        """
+        Checks if the worker is registered and its circuit breaker did not change state since the given generation.
+        """
+        return worker in self.workers and self.workers[worker].generation == generation
+
+    def record_success(self, worker, generation):
+        """
+        Records a successful call to the worker. Adds the worker back to the virtual queue engine if it recovered.
+        Results of calls started before the last state change of the circuit breaker are discarded.
+        :param worker: Worker object
+        :param generation: The generation of the circuit breaker when the call started.
+        """
+        if self._is_current(worker, generation) and self.workers[worker].record_success():
+            print(f"Worker {worker.worker_id} recovered, closing circuit")
+            self.vq_engine.add_worker(worker)
+
+    def record_failure(self, worker, generation):
+        """
+        Records a failed call to the worker. Removes the worker from the virtual queue engine if its circuit opened.
+        Results of calls started before the last state change of the circuit breaker are discarded.
+        :param worker: Worker object
+        :param generation: The generation of the circuit breaker when the call started.
+        """
+        if self._is_current(worker, generation) and self.workers[worker].record_failure():
+            print(f"Worker {worker.worker_id} unreachable, opening circuit")
+            self.vq_engine.remove_worker(worker)
+
+    async def _check_worker(self, worker):
+        """
+        Health checks a single worker if its circuit breaker allows it.
+        :param worker: Worker object
+        """
+        breaker = self.workers.get(worker)
+        if breaker is None or not breaker.should_check():
+            return
+
+        generation = breaker.generation
+        if await asyncio.to_thread(worker.check_health):
+            self.record_success(worker, generation)
+        else:
+            self.record_failure(worker, generation)
+
+    async def run_health_checks(self):
+        """
+        Runs health checks for all workers concurrently in an infinite loop.
+        """
+        while True:
+            await asyncio.gather(
+                *(self._check_worker(worker) for worker in list(self.workers))
+            )
+            await asyncio.sleep(self.config.health_check_interval)
@@ -7,10 +7,15 @@ class RWTEstimator:
     def __init__(self):
         self.config = Config()
 
-    def get_waiting_time(self, group):
+    def get_service_time(self, model):
 
-        num_requests = len(group.requests)
         est_workload_tokens = self.config.workload_tokens
-        est_token_throughput = self.config.token_throughput[group.model]
+        est_token_throughput = self.config.token_throughput[model]
+
+        return est_workload_tokens / est_token_throughput
+
+    def get_waiting_time(self, group):
+
+        num_requests = len(group)
 
-        return num_requests * est_workload_tokens / est_token_throughput
+        return num_requests * self.get_service_time(group.model)
@@ -0,0 +1,16 @@
+class SchedulePlan:
+    """
+    SchedulePlan class stores the group ordering computed by the scheduler for every virtual queue.
+    The plan is computed on a snapshot of the virtual queues and applied later by the virtual queue engine.
+    """
+
+    def __init__(self, version, vqs):
+        """
+        Initializes the plan from the reordered snapshot of the virtual queues.
+        :param version: The version of the snapshot the plan was computed on.
+        :param vqs: The list of reordered snapshot virtual queues.
+        """
+        self.version = version
+        self.vq_orders = {
+            vq.vq_id: [group.group_id for group in vq.groups] for vq in vqs
+        }
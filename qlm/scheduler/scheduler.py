@@ -28,20 +28,18 @@ class Scheduler:
 
     def _update_all_slos(self, vqs):
         """
-        Updates the SLOs for all requests in the virtual queues based on current time.
-        :param vqs: The list of virtual queues.
+        Updates the SLOs for all groups in the snapshot virtual queues to the remaining time before the deadline of
+        their head request.
+        :param vqs: The list of snapshot virtual queues.
         """
+        curr_time = time.time()
         for vq in vqs:
             for group in vq.groups:
-                for request in group.requests:
-                    curr_time = time.time()
-                    request.slo -= curr_time - request.insertion_time
-                    request.slo = (
-                        request.slo
-                        // self.config.slo_granularity
-                        * self.config.slo_granularity
-                    )
-                    request.insertion_time = curr_time
+                group.slo = (
+                    (group.deadline - curr_time)
+                    // self.config.slo_granularity
+                    * self.config.slo_granularity
+                )
 
     def check_violation(self, vqs):
         """